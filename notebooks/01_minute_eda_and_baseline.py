@@ -5,6 +5,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from src.data_loader import load_minute_csv
 from src.market_env import MarketEnv
+from src._numba_kernels import equity_kernel, sweep_kernel
 
 # 自动选择 CSV：优先使用 data/*_clean.csv，其次 data/sample_minute.csv
 proj_root = pathlib.Path(__file__).resolve().parent.parent
@@ -47,31 +48,41 @@ print("已保存价格图：", price_fig)
 # 特征工程（简单 SMA 示例）
 SMA_SHORT = 5
 SMA_LONG = 20
-df['sma_short'] = df['close'].rolling(SMA_SHORT).mean()
-df['sma_long'] = df['close'].rolling(SMA_LONG).mean()
+TICK_SIZE = 0.01  # A 股最小报价单位
+
+def sma(x, n, tick=None):
+    # 基于累加和的 O(N) 滑动均值：窗口和 = c[i+n] - c[i]，前 n-1 个位置为 NaN
+    # 给定 tick 且序列确实落在 tick 网格上（如以 float32 存储的 A 股分价）时，先换算为整数个 tick：
+    # 累加和、窗口和都是精确整数，均值 = 窗口和 / n 再乘 tick，数学上相等的均线得到相同的浮点值；
+    # 否则直接按 float64 原值计算，不做任何舍入
+    x = np.asarray(x, dtype=np.float64)
+    scale = 1.0
+    if tick is not None:
+        ticks = x / tick
+        rounded = np.round(ticks)
+        if np.allclose(ticks, rounded, rtol=0, atol=0.1):
+            x, scale = rounded, tick
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    out = np.full(len(x), np.nan, dtype=np.float64)
+    out[n - 1:] = (c[n:] - c[:-n]) / n * scale
+    return out
+
+closes = df['close'].values
+df['sma_short'] = sma(closes, SMA_SHORT, tick=TICK_SIZE)
+df['sma_long'] = sma(closes, SMA_LONG, tick=TICK_SIZE)
 df = df.dropna()
 
 # 向量化 SMA 交叉策略
 signal = np.where(df['sma_short'] > df['sma_long'], 1, -1)
-positions = pd.Series(signal, index=df.index).shift(1).fillna(0)
-returns = df['return'] * positions
 # 交易成本示例
 TRANSACTION_COST = 0.0005
-pos_change = positions.diff().abs().fillna(0)
-returns_net = returns - pos_change * TRANSACTION_COST
-equity = (1 + returns_net).cumprod()
+# 持仓滞后一根 bar、扣除调仓成本、累乘净值并跟踪最大回撤，在 numba 内核中一次遍历完成
+equity_arr, final_equity, maxdd = equity_kernel(signal.astype(np.float64), df['return'].values, TRANSACTION_COST)
+equity = pd.Series(equity_arr, index=df.index)
 
-# 计算简单统计（总收益、最大回撤）
-final_equity = equity.iloc[-1]
+# 简单统计（总收益、最大回撤）
 total_return = final_equity - 1.0
 
-def max_drawdown(cum_returns):
-    roll_max = cum_returns.cummax()
-    drawdown = (cum_returns - roll_max) / roll_max
-    return drawdown.min()
-
-maxdd = max_drawdown(equity)
-
 print(f"策略最后净值: {final_equity:.6f}, 总收益: {total_return:.6f}, 最大回撤: {maxdd:.6f}")
 
 # 保存净值图
@@ -87,15 +98,35 @@ plt.savefig(equity_fig)
 plt.close()
 print("已保存净值图：", equity_fig)
 
+# SMA 参数网格：向量化构造 (K, N) 信号矩阵，numba prange 并行回测
+SWEEP_SHORT = [3, 5, 10]
+SWEEP_LONG = [20, 30, 60]
+grid = [(s, l) for s in SWEEP_SHORT for l in SWEEP_LONG if s < l]
+closes = df['close'].values
+# 所有组合的均线都有效之后再开始回测：共同窗口比主回测晚 start 根 bar，
+# 因此 (SMA_SHORT, SMA_LONG) 一行的数值与上方主回测不同
+start = max(SWEEP_LONG) - 1
+smas = {n: sma(closes, n, tick=TICK_SIZE)[start:] for n in set(SWEEP_SHORT + SWEEP_LONG)}
+# 主回测参数直接复用 df 中已算好的均线列
+smas[SMA_SHORT] = df['sma_short'].values[start:]
+smas[SMA_LONG] = df['sma_long'].values[start:]
+sig_matrix = np.stack([np.where(smas[s] > smas[l], 1, -1) for s, l in grid]).astype(np.int8)
+sweep = sweep_kernel(sig_matrix, df['return'].values[start:].astype(np.float64), TRANSACTION_COST)
+sweep_df = pd.DataFrame(sweep, columns=['final_equity', 'max_drawdown'],
+                        index=pd.MultiIndex.from_tuples(grid, names=['sma_short', 'sma_long']))
+print(f"SMA 参数网格回测（共同窗口 {df.index[start]} 起，比主回测少前 {start} 根 bar，与上方主回测结果不可直接比较）：")
+print(sweep_df.sort_values('final_equity', ascending=False).to_string(float_format=lambda v: f"{v:.6f}"))
+
 # 构造 RL 环境并快速测试 env 接口
 features = df[['return','sma_short','sma_long']].values
 prices = df['close'].values
 T = min(2000, len(prices))
 env = MarketEnv(features[:T], prices[:T], window=30, transaction_cost=TRANSACTION_COST)
 
-obs = env.reset()
+obs, info = env.reset()
+sample_action = env.action_space.sample
 for _ in range(3):
-    o, r, d, info = env.step(env.action_space.sample())
+    o, r, terminated, truncated, info = env.step(sample_action())
 print("env 小测试通过")
 
 # 保存简单报告
@@ -13,7 +13,10 @@
 """
 import argparse
 from pathlib import Path
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 
 
@@ -30,10 +33,23 @@ def trading_days_between(start_date, end_date):
     return [d.strftime("%Y-%m-%d") for d in days]
 
 
+def _to_datetime_fast(values):
+    """
+    先按固定格式走 pandas 的 C 解析快路径，仅对解析失败（NaT）的行回退到格式推断。
+    """
+    parsed = pd.to_datetime(values, format='%Y-%m-%d %H:%M:%S', errors='coerce', cache=True)
+    failed = (parsed.isna() & values.notna()).to_numpy()
+    if failed.any():
+        parsed.iloc[failed] = pd.to_datetime(values.iloc[failed], errors='coerce', cache=True).to_numpy()
+    return parsed
+
+
 def parse_and_normalize_minute_df(df_raw, day_str):
     """
     将 akshare 返回的一日或多日分钟数据标准化为包含 datetime (pd.Timestamp)、open,high,low,close,volume 的 DataFrame。
-    - day_str: 下载请求对应的日期字符串（YYYY-MM-DD），用于把只有时间的 '时间' 列合并成完整 datetime。
+    - day_str: 下载请求对应的日期字符串（YYYY-MM-DD），用于把只有时间的 '时间' 列合并成完整 datetime；
+      也可以是与 df_raw 行对齐的日期数组（多日原始数据拼接后一次性解析）。
+    只保留各行落在其请求日期当天的数据。
     返回：df 或 None（无法解析时）
     """
     if df_raw is None or df_raw.empty:
@@ -70,8 +86,15 @@ def parse_and_normalize_minute_df(df_raw, day_str):
     if datetime_col is None:
         return None
 
-    # Clean whitespace
-    df[datetime_col] = df[datetime_col].astype(str).str.strip()
+    # per-row request day (scalar or one entry per row when several days are parsed together)
+    df['_request_day'] = day_str if isinstance(day_str, str) else np.asarray(day_str)
+
+    # Clean whitespace (only skip stringifying when the values really are strings;
+    # object columns may hold datetime/date/time objects)
+    raw = df[datetime_col]
+    if not (pd.api.types.is_string_dtype(raw) or pd.api.types.infer_dtype(raw, skipna=True) == 'string'):
+        raw = raw.astype(str)
+    df[datetime_col] = raw.str.strip()
 
     # If value contains a date (e.g., '2025-10-01 09:30:00'), parse directly
     sample = df[datetime_col].dropna().astype(str).head(5).tolist()
@@ -79,17 +102,11 @@ def parse_and_normalize_minute_df(df_raw, day_str):
 
     if contains_date:
         # parse as full datetime
-        try:
-            df['datetime'] = pd.to_datetime(df[datetime_col], errors='coerce', infer_datetime_format=True)
-        except Exception:
-            df['datetime'] = pd.to_datetime(df[datetime_col], errors='coerce')
+        df['datetime'] = _to_datetime_fast(df[datetime_col])
     else:
         # assume datetime_col contains only times like '09:30' or '09:30:00'
         # combine with provided day_str
-        try:
-            df['datetime'] = pd.to_datetime(day_str + ' ' + df[datetime_col], errors='coerce', infer_datetime_format=True)
-        except Exception:
-            df['datetime'] = pd.to_datetime(day_str + ' ' + df[datetime_col], errors='coerce')
+        df['datetime'] = _to_datetime_fast(df['_request_day'] + ' ' + df[datetime_col])
 
     # If parsing failed (many NaT), try more heuristics
     if df['datetime'].isna().mean() > 0.5:
@@ -98,12 +115,15 @@ def parse_and_normalize_minute_df(df_raw, day_str):
             nums = pd.to_numeric(df[datetime_col], errors='coerce')
             if nums.notna().any():
                 # numbers might be seconds since midnight: convert to timedelta and add day
-                df['datetime'] = pd.to_datetime(day_str) + pd.to_timedelta(nums, unit='s')
+                df['datetime'] = pd.to_datetime(df['_request_day'], format='%Y-%m-%d', cache=True) + pd.to_timedelta(nums, unit='s')
         except Exception:
             pass
 
     # Drop rows that failed parsing
     df = df.dropna(subset=['datetime'])
+    # Keep only rows on their request day (returned data may cover several days);
+    # compare normalized datetime64 values rather than per-row datetime.date objects
+    df = df[df['datetime'].dt.normalize() == pd.to_datetime(df['_request_day'], format='%Y-%m-%d', cache=True)]
     if df.empty:
         return None
 
@@ -137,8 +157,10 @@ def parse_and_normalize_minute_df(df_raw, day_str):
     # Keep only datetime + OHLCV if exist
     keep = ['datetime'] + [c for c in ['open','high','low','close','volume'] if c in df.columns]
     df = df[keep].copy()
-    # Set datetime as index
-    df = df.set_index('datetime').sort_index()
+    # Set datetime as index; per-day data arrives in order, so only sort when needed
+    df = df.set_index('datetime')
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
 
     # Ensure numeric types
     for c in ['open','high','low','close','volume']:
@@ -152,7 +174,25 @@ def parse_and_normalize_minute_df(df_raw, day_str):
     return df
 
 
-def download_minute_range_and_save(symbol_code, start_date, end_date, freq=1, out_dir="data", sleep=0.4):
+class _RateLimiter:
+    """
+    线程安全的请求节流：相邻两次 wait() 返回的时间间隔至少为 interval 秒。
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def download_minute_range_and_save(symbol_code, start_date, end_date, freq=1, out_dir="data", sleep=0.4, workers=4):
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
@@ -161,44 +201,71 @@ def download_minute_range_and_save(symbol_code, start_date, end_date, freq=1, ou
 
     last_successful = None
     tried_prefixes = set()
+    limiter = _RateLimiter(sleep)
     for prefix in prefixes:
         tried_prefixes.add(prefix)
         ak_symbol = f"{prefix}{symbol_code}"
         print(f"尝试前缀 {prefix}，标的 {ak_symbol}，按天下载 {len(days)} 个交易日，freq={freq}m")
-        frames = []
-        failed_days = []
-        for d in days:
+        period = str(freq)
+
+        def fetch(d):
+            # ak.stock_zh_a_minute 有时返回当日分钟（带时间或仅带时分）
+            limiter.wait()
             try:
-                # ak.stock_zh_a_minute 有时返回当日分钟（带时间或仅带时分）
-                period = str(freq)
-                df_raw = ak.stock_zh_a_minute(symbol=ak_symbol, period=period, adjust="")
-                # parse and normalize
-                df_day = parse_and_normalize_minute_df(df_raw, d)
-                if df_day is None or df_day.empty:
-                    # 有时 akshare 返回空或格式不同；记录并继��
+                return d, ak.stock_zh_a_minute(symbol=ak_symbol, period=period, adjust=""), None
+            except Exception as e:
+                return d, None, e
+
+        raw_frames = []
+        failed_days = []
+        # 并发下载以重叠网络延迟，请求发起频率仍由 limiter 限制在每 sleep 秒一次
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for d, df_raw, err in ex.map(fetch, days):
+                if err is not None:
+                    print(f"  {ak_symbol} 日 {d} 下载失败: {err}")
+                    failed_days.append(d)
+                elif df_raw is None or df_raw.empty:
+                    # 有时 akshare 返回空或格式不同；记录并继续
                     print(f"  {ak_symbol} 日 {d} 未返回有效数据，跳过")
                     failed_days.append(d)
-                    time.sleep(sleep)
+                else:
+                    raw_frames.append((df_raw, d))
+
+        result = None
+        if raw_frames:
+            # 拼接所有日的原始数据后一次性解析 datetime，而不是逐日调用 pd.to_datetime
+            df_all = pd.concat([f for f, _ in raw_frames])
+            day_col = np.concatenate([np.full(len(f), d, dtype=object) for f, d in raw_frames])
+            try:
+                parsed = parse_and_normalize_minute_df(df_all, day_col)
+            except Exception as e:
+                print(f"  {ak_symbol} 批量解析失败: {e}，改为逐日解析")
+                parsed = None
+            parts = [] if parsed is None else [parsed]
+            got_days = set() if parsed is None else set(parsed.index.strftime("%Y-%m-%d"))
+            # 批量解析未覆盖的日期（异常，或各日格式不一致导致全局格式判断失效）逐日重新解析
+            for df_raw, d in raw_frames:
+                if d in got_days:
                     continue
-                # Filter to that day if returned data covers multiple days
-                df_day = df_day[(df_day.index.date == pd.to_datetime(d).date())]
-                if df_day.empty:
+                try:
+                    df_day = parse_and_normalize_minute_df(df_raw, d)
+                except Exception as e:
+                    print(f"  {ak_symbol} 日 {d} 解析失败: {e}")
+                    df_day = None
+                if df_day is None or df_day.empty:
                     print(f"  {ak_symbol} 日 {d} 解析后无该日数据，跳过")
                     failed_days.append(d)
-                    time.sleep(sleep)
                     continue
-                frames.append(df_day)
+                parts.append(df_day)
+            if parts:
+                result = parts[0] if len(parts) == 1 else pd.concat(parts)
+                if not result.index.is_monotonic_increasing:
+                    result = result.sort_index()
                 last_successful = prefix
-                time.sleep(sleep)
-            except Exception as e:
-                print(f"  {ak_symbol} 日 {d} 下载失败: {e}")
-                failed_days.append(d)
-                time.sleep(sleep)
-
-        if frames:
-            # 合并并去重
-            result = pd.concat(frames).sort_index()
-            result = result[~result.index.duplicated(keep='first')]
+
+        if result is not None:
+            # 解析结果已按时间排序，只需去重
+            result = result.loc[~result.index.duplicated(keep='first')]
             out_path = out_dir / f"{symbol_code}_{freq}m_{prefix}_ts.csv"
             result.to_csv(out_path)
             print(f"使用前缀 {prefix} 成功，已保存 {len(result)} 行到 {out_path}")
@@ -218,12 +285,13 @@ def main():
     parser.add_argument("--end", required=True, help="结束日期 YYYY-MM-DD")
     parser.add_argument("--freq", default=1, type=int, help="分钟频率，例如 1、5、15")
     parser.add_argument("--out", default="data", help="输出目录，默认 data/")
-    parser.add_argument("--sleep", default=0.4, type=float, help="每次请求后的 sleep 秒数，避免限流")
+    parser.add_argument("--sleep", default=0.4, type=float, help="相邻两次请求之间的最小间隔秒数，避免限流")
+    parser.add_argument("--workers", default=4, type=int, help="并发下载线程数")
     args = parser.parse_args()
 
     print("开始下载：", args.symbol, args.start, "->", args.end, f"freq={args.freq}m")
     try:
-        out_path = download_minute_range_and_save(args.symbol, args.start, args.end, freq=args.freq, out_dir=args.out, sleep=args.sleep)
+        out_path = download_minute_range_and_save(args.symbol, args.start, args.end, freq=args.freq, out_dir=args.out, sleep=args.sleep, workers=args.workers)
         print("下载并保存完成，文件：", out_path)
     except Exception as e:
         print("下载失败：", e)
@@ -14,16 +14,16 @@ from pathlib import Path
 import pandas as pd
 import numpy as np
 
+# minute offsets from 09:30 for one trading day: 09:30-11:30 and 13:00-15:00 (inclusive)
+_SESSION_OFFSETS = np.concatenate([np.arange(0, 121), np.arange(210, 331)]).astype('timedelta64[m]')
+
 def trading_minutes_for_days(days):
-    parts = []
-    for d in days:
-        morning = pd.date_range(f"{d} 09:30", f"{d} 11:30", freq="1min")
-        afternoon = pd.date_range(f"{d} 13:00", f"{d} 15:00", freq="1min")
-        parts.append(morning.append(afternoon))
-    if parts:
-        return pd.DatetimeIndex(np.concatenate([p.values for p in parts]))
-    else:
+    # broadcast day starts (D,1) against per-day minute offsets (1,M) -> one flat index
+    if len(days) == 0:
         return pd.DatetimeIndex([])
+    starts = pd.to_datetime(days, format='%Y-%m-%d').values.astype('datetime64[m]') + np.timedelta64(9 * 60 + 30, 'm')
+    all_ts = (starts[:, None] + _SESSION_OFFSETS[None, :]).ravel()
+    return pd.DatetimeIndex(all_ts)
 
 def extend_days_until_length(days, required_len):
     # extend by adding more business days after the last day until total minutes >= required_len
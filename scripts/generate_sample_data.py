@@ -6,39 +6,39 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
-def generate_single_day(date="2025-01-02"):
+# 每个交易日相对 09:30 的分钟偏移：09:30-11:30 与 13:00-15:00（含端点）
+_SESSION_OFFSETS = np.concatenate([np.arange(0, 121), np.arange(210, 331)]).astype('timedelta64[m]')
+
+def generate_single_day(date="2025-01-02", rng=None):
+    return generate_multiple_days(n_days=1, start_date=date, rng=rng)
+
+def generate_multiple_days(n_days=5, start_date="2025-01-02", rng=None):
+    # 一次性生成 n_days 天的数据：单次 RNG 调用 + 广播构造时间索引，无逐日循环和 pd.concat
+    rng = np.random.default_rng() if rng is None else rng
+    n = len(_SESSION_OFFSETS)
     # 生成交易日的分钟时间索引（简单版，不考虑午休以外的假期）
-    morning = pd.date_range(f"{date} 09:30", f"{date} 11:30", freq="1min")
-    afternoon = pd.date_range(f"{date} 13:00", f"{date} 15:00", freq="1min")
-    idx = morning.append(afternoon)
-    n = len(idx)
-    # 生成价格随机游走
-    price = 100 + np.cumsum(np.random.normal(scale=0.02, size=n))
+    days = np.datetime64(pd.to_datetime(start_date).date(), 'D') + np.arange(n_days)
+    starts = days.astype('datetime64[m]') + np.timedelta64(9 * 60 + 30, 'm')
+    idx = (starts[:, None] + _SESSION_OFFSETS[None, :]).ravel()
+    noise = rng.standard_normal((n_days, n, 5)) * np.array([0.02, 0.005, 0.005, 0.01, 0.01])
+    # 生成价格随机游走（每天从 100 重新开始）
+    price = 100 + np.cumsum(noise[..., 0], axis=1)
     # 构造 OHLCV
-    open_p = price + np.random.normal(scale=0.005, size=n)
-    close_p = price + np.random.normal(scale=0.005, size=n)
-    high_p = np.maximum(open_p, close_p) + np.abs(np.random.normal(scale=0.01, size=n))
-    low_p = np.minimum(open_p, close_p) - np.abs(np.random.normal(scale=0.01, size=n))
-    volume = np.random.randint(100, 1000, size=n)
+    open_p = price + noise[..., 1]
+    close_p = price + noise[..., 2]
+    high_p = np.maximum(open_p, close_p) + np.abs(noise[..., 3])
+    low_p = np.minimum(open_p, close_p) - np.abs(noise[..., 4])
+    volume = rng.integers(100, 1000, size=n_days * n)
     df = pd.DataFrame({
-        "datetime": idx,
-        "open": open_p,
-        "high": high_p,
-        "low": low_p,
-        "close": close_p,
+        "datetime": pd.DatetimeIndex(idx),
+        "open": open_p.ravel(),
+        "high": high_p.ravel(),
+        "low": low_p.ravel(),
+        "close": close_p.ravel(),
         "volume": volume
     })
     return df
 
-def generate_multiple_days(n_days=5, start_date="2025-01-02"):
-    start = pd.to_datetime(start_date)
-    frames = []
-    for i in range(n_days):
-        d = (start + pd.Timedelta(days=i)).strftime("%Y-%m-%d")
-        frames.append(generate_single_day(d))
-    df = pd.concat(frames).reset_index(drop=True)
-    return df
-
 if __name__ == "__main__":
     Path("../data/data").mkdir(parents=True, exist_ok=True)
     df = generate_multiple_days(n_days=10, start_date="2025-01-02")
@@ -1,8 +1,31 @@
 # name=scripts/prepare_minute_csv.py
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import argparse
 
+def fill_gaps(df):
+    """
+    Same result as df.ffill().bfill().dropna(), in one pass per column with gaps:
+    columns without NaN are left untouched, the rest are filled through a single
+    gather over the forward-fill index (leading NaNs take the first valid value).
+    """
+    n = len(df)
+    for c in df.columns:
+        a = df[c].to_numpy()
+        valid = ~pd.isna(a)
+        if valid.all():
+            continue
+        if not valid.any():
+            # an all-NaN column would make dropna() remove every row
+            return df.iloc[0:0]
+        idx = np.where(valid, np.arange(n), 0)
+        np.maximum.accumulate(idx, out=idx)
+        first = int(np.argmax(valid))
+        idx[:first] = first
+        df[c] = a[idx]
+    return df
+
 def normalize_csv(in_path, out_path=None):
     p = Path(in_path)
     if out_path is None:
@@ -13,7 +36,10 @@ def normalize_csv(in_path, out_path=None):
     if not dt_candidates:
         raise ValueError("无法识别 datetime 列，��始列名：" + ",".join(df.columns))
     dt_col = dt_candidates[0]
-    df[dt_col] = pd.to_datetime(df[dt_col])
+    try:
+        df[dt_col] = pd.to_datetime(df[dt_col], format='ISO8601', cache=True)
+    except (ValueError, TypeError):
+        df[dt_col] = pd.to_datetime(df[dt_col], cache=True)
     df = df.set_index(dt_col).sort_index()
     # map chinese column names if present
     rename_map = {}
@@ -35,9 +61,16 @@ def normalize_csv(in_path, out_path=None):
     keep = [c for c in ['open','high','low','close','volume'] if c in df.columns]
     df = df[keep].copy()
     # forward/backfill small gaps, then drop rows with any NA
-    df = df.ffill().bfill().dropna()
+    df = fill_gaps(df)
     df.to_csv(out_path)
     print("Saved cleaned csv:", out_path, "rows:", len(df))
+    # also cache as parquet next to the csv; load_minute_csv prefers it when up to date
+    parquet_path = Path(out_path).with_suffix('.parquet')
+    try:
+        df.to_parquet(parquet_path, engine='pyarrow', compression='zstd')
+        print("Saved parquet cache:", parquet_path)
+    except ImportError:
+        print("pyarrow not installed, skip parquet cache")
     return out_path
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+"""
+MarketEnv 等热点路径使用的 numba 内核。
+未安装 numba 时 njit 退化为空装饰器，内核以纯 Python 执行（结果一致，只是更慢）。
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
+
+@njit(cache=True, fastmath=True)
+def step_kernel(ret, position, new_pos, tc_rate):
+    """
+    单步标量计算：持有 position 获得该 bar 收益 ret（由 MarketEnv.rets 预先计算），减去调仓成本。
+    返回 (reward, pnl, tc)。
+    """
+    pnl = position * ret
+    tc = abs(new_pos - position) * tc_rate
+    return pnl - tc, pnl, tc
+
+
+@njit(cache=True)
+def equity_kernel(signal, rets, tc_rate):
+    """
+    单次遍历的信号回测：第 i 根 bar 持有 signal[i-1]（首根空仓），
+    扣除调仓成本后累乘得到净值曲线；同一遍历中维护净值的历史最高点和最大回撤。
+    返回 (equity, final_equity, max_drawdown)，max_drawdown 为 (e - 历史最高) / 历史最高 的最小值（<= 0）。
+    """
+    n = signal.shape[0]
+    equity = np.empty(n)
+    prev_pos = 0.0
+    e = 1.0
+    roll_max = 0.0
+    min_dd = 0.0
+    for i in range(n):
+        pos = signal[i - 1] if i > 0 else 0.0
+        r = pos * rets[i] - abs(pos - prev_pos) * tc_rate
+        e *= 1.0 + r
+        equity[i] = e
+        prev_pos = pos
+        roll_max = max(roll_max, e)
+        min_dd = min(min_dd, (e - roll_max) / roll_max)
+    return equity, e, min_dd
+
+
+@njit(cache=True, parallel=True)
+def sweep_kernel(signals, rets, tc_rate):
+    """
+    多组信号（如 SMA 参数网格、多标的）的并行回测：signals 形状 (K, N)，各行共享同一 rets。
+    返回 (K, 2) 数组，每行为 (final_equity, max_drawdown)。
+    """
+    k_total = signals.shape[0]
+    out = np.empty((k_total, 2))
+    for k in prange(k_total):
+        _, final_e, min_dd = equity_kernel(signals[k], rets, tc_rate)
+        out[k, 0] = final_e
+        out[k, 1] = min_dd
+    return out
@@ -1,28 +1,79 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+def _read_csv(path):
+    """
+    Read a CSV with pandas' multithreaded pyarrow engine, falling back to the
+    default parser when pyarrow is not installed.
+    """
+    try:
+        return pd.read_csv(path, engine='pyarrow')
+    except ImportError:
+        return pd.read_csv(path)
+
+def _to_datetime(values):
+    """
+    Parse timestamps with pandas' ISO8601 fast path (cache=True so repeated values parse once);
+    fall back to per-element inference for non-ISO inputs (e.g. integer sequences).
+    """
+    try:
+        return pd.to_datetime(values, format='ISO8601', cache=True)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, cache=True)
+
+def _parquet_sibling(path):
+    """
+    Return the .parquet cache written next to a .csv (see scripts/prepare_minute_csv.py)
+    if it exists and is not older than the csv; otherwise None.
+    """
+    p = Path(path)
+    if p.suffix.lower() != '.csv':
+        return None
+    pq = p.with_suffix('.parquet')
+    if not pq.exists() or (p.exists() and pq.stat().st_mtime < p.stat().st_mtime):
+        return None
+    return pq
+
 def load_minute_csv(path_or_df):
     """
     Load minute-level OHLCV data from a CSV path or DataFrame.
+    An up-to-date .parquet sibling of the CSV is read instead when present.
     Expected columns (case-insensitive): datetime, open, high, low, close, volume
     datetime must be parseable; returned index is pd.DatetimeIndex.
     """
     if isinstance(path_or_df, pd.DataFrame):
         df = path_or_df.copy()
     else:
-        df = pd.read_csv(path_or_df)
+        parquet = _parquet_sibling(path_or_df)
+        if parquet is not None:
+            df = pd.read_parquet(parquet).reset_index()
+        else:
+            df = _read_csv(path_or_df)
     # normalize column names
     df.columns = [c.lower() for c in df.columns]
     # try common names
     dt_col = 'datetime' if 'datetime' in df.columns else 'date' if 'date' in df.columns else df.columns[0]
-    df[dt_col] = pd.to_datetime(df[dt_col])
+    if not pd.api.types.is_datetime64_any_dtype(df[dt_col]):
+        df[dt_col] = _to_datetime(df[dt_col])
     df = df.set_index(dt_col).sort_index()
     # keep expected columns if present (fallback to available)
     keep = []
     for c in ['open','high','low','close','volume']:
         if c in df.columns:
             keep.append(c)
-    df = df[keep].astype(float)
+    df = df[keep]
+    # compact dtypes: float32 prices; volume as int32 when whole and in range,
+    # otherwise int64 (large whole volumes) or float64 (gaps / fractional volumes)
+    dtypes = {c: np.float32 for c in ['open','high','low','close']}
+    if 'volume' in df.columns:
+        vol = df['volume']
+        if vol.notna().all() and (vol % 1 == 0).all():
+            fits_int32 = (vol.abs().max() if len(vol) else 0) <= np.iinfo(np.int32).max
+            dtypes['volume'] = np.int32 if fits_int32 else np.int64
+        else:
+            dtypes['volume'] = np.float64
+    df = df.astype({k: v for k, v in dtypes.items() if k in df.columns})
     return df
 
 def resample_to_minutes(df, rule='1T'):
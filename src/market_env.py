@@ -1,6 +1,11 @@
 import numpy as np
-import gym
-from gym import spaces
+import gymnasium as gym
+from gymnasium import spaces
+
+from ._numba_kernels import step_kernel
+
+# action -> position 查找表：0: hold(空仓), 1: long, 2: short
+_POS_LUT = np.array([0, 1, -1], dtype=np.int8)
 
 class MarketEnv(gym.Env):
     """
@@ -9,49 +14,86 @@ class MarketEnv(gym.Env):
     Action: Discrete(3) -> 0: hold, 1: long, 2: short
     Reward: pnl change between steps (minus transaction cost when position changes)
     """
-    metadata = {'render.modes': ['human']}
+    metadata = {'render_modes': ['human']}
 
     def __init__(self, features, prices, window=30, transaction_cost=0.0005):
         super().__init__()
-        self.features = features
-        self.prices = np.array(prices, dtype=float)
+        # 一次性转为 float32，避免 _get_obs 每步 astype
+        self.features = np.array(features, dtype=np.float32, order='C')
+        p = np.asarray(prices, dtype=np.float64)
+        self.prices = p.astype(np.float32)
         self.window = window
         self.transaction_cost = transaction_cost
         self.T = len(self.prices)
-        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(window, features.shape[1]), dtype=np.float32)
+        # 预先计算逐 bar 收益（step 与 rollout 共用）：rets[t] = (prices[t] - prices[t-1]) / prices[t-1]，rets[0] = 0
+        # 在 float32 降精度之前用 float64 输入计算，保证奖励精度
+        self.rets = np.zeros(self.T, dtype=np.float64)
+        self.rets[1:] = np.diff(p) / p[:-1]
+        self.observation_space = spaces.Box(low=-np.inf, high=np.inf, shape=(window, self.features.shape[1]), dtype=np.float32)
         self.action_space = spaces.Discrete(3)
+        # 预热 JIT，避免首次 step 时编译
+        step_kernel(0.0, 0, 0, self.transaction_cost)
         self.reset()
 
-    def reset(self):
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        if seed is not None:
+            self.action_space.seed(seed)
         self.t = self.window
         self.position = 0
         self.last_price = self.prices[self.t - 1]
         self.done = False
-        return self._get_obs()
+        return self._get_obs(), {}
 
     def _get_obs(self):
-        return self.features[self.t - self.window:self.t].astype(np.float32)
+        # 返回独立副本（window x F 的 float32，拷贝开销很小），调用方可自由保存或修改
+        return self.features[self.t - self.window:self.t].copy()
 
     def step(self, action):
         if self.done:
             raise RuntimeError("Environment done. Call reset().")
-        pos_map = {0: 0, 1: 1, 2: -1}
-        new_pos = pos_map[int(action)]
-        price = self.prices[self.t]
-        ret = (price - self.last_price) / self.last_price
-        pnl = self.position * ret
-        tc = 0.0
-        if new_pos != self.position:
-            tc = abs(new_pos - self.position) * self.transaction_cost
-        reward = pnl - tc
+        action = int(action)
+        # 负数会被 numpy 当作从尾部索引，需显式校验
+        if not 0 <= action < len(_POS_LUT):
+            raise ValueError(f"非法 action {action}，应为 0、1 或 2")
+        new_pos = int(_POS_LUT[action])
+        reward, pnl, tc = step_kernel(self.rets[self.t], self.position, new_pos, self.transaction_cost)
         self.position = new_pos
-        self.last_price = price
+        # last_price 仅用于 render
+        self.last_price = self.prices[self.t]
         self.t += 1
         if self.t >= self.T:
             self.done = True
-        obs = self._get_obs() if not self.done else np.zeros_like(self._get_obs())
+        obs = self._get_obs() if not self.done else np.zeros(self.observation_space.shape, dtype=np.float32)
         info = {'pnl': pnl, 'tc': tc}
-        return obs, reward, self.done, info
+        # 数据走完即 terminated，环境本身没有截断（truncated 恒为 False）
+        return obs, reward, self.done, False, info
+
+    def rollout(self, actions):
+        """
+        从 episode 起点一次性执行整段动作序列（向量化，等价于 reset() 后逐个调用 step()）。
+        适用于动作已知或预先计算好的回测式评估。
+        返回：(rewards, info)，info 包含逐步的 'pnl'、'tc' 与 'position' 数组。
+        """
+        actions = np.asarray(actions, dtype=int)
+        n = len(actions)
+        if n > self.T - self.window:
+            raise ValueError(f"actions 长度 {n} 超过可用步数 {self.T - self.window}")
+        if n and (actions.min() < 0 or actions.max() >= len(_POS_LUT)):
+            raise ValueError("actions 中存在非法取值，应为 0、1 或 2")
+        positions = np.take(_POS_LUT, actions).astype(int)
+        # 每一步持有的是上一步决定的仓位（episode 起点为空仓）
+        held = np.concatenate([[0], positions[:-1]])
+        pnl = held * self.rets[self.window:self.window + n]
+        tc = np.abs(np.diff(positions, prepend=0)) * self.transaction_cost
+        reward = pnl - tc
+        # 同步环境状态，使之与逐步执行 n 次 step() 后一致
+        self.t = self.window + n
+        self.position = int(positions[-1]) if n else 0
+        self.last_price = self.prices[self.t - 1]
+        self.done = self.t >= self.T
+        info = {'pnl': pnl, 'tc': tc, 'position': positions}
+        return reward, info
 
-    def render(self, mode='human'):
+    def render(self):
         print(f"t={self.t}, pos={self.position}, last_price={self.last_price:.4f}")
\ No newline at end of file
@@ -9,7 +9,13 @@ for c in df.columns:
         print("Sample datetime column values (first 10):")
         print(df[c].head(10))
 # 读取为 index（如果已是 index，替换为你的文件）
-df2 = pd.read_csv(p, parse_dates=True, index_col=0)
+try:
+    df2 = pd.read_csv(p, parse_dates=True, index_col=0, date_format='ISO8601')
+except TypeError:  # pandas < 2.0 没有 date_format 参数
+    df2 = pd.read_csv(p, parse_dates=True, index_col=0)
+# 非 ISO 格式时 read_csv 不报错而是保留字符串索引，需要再按 mixed 解析
+if not pd.api.types.is_datetime64_any_dtype(df2.index):
+    df2.index = pd.to_datetime(df2.index, format='mixed')
 print("After parse index dtype:", df2.index.dtype)
 print("Index sample:", df2.index[:5])
 print("Index type of first element:", type(df2.index[0]))
\ No newline at end of file